@@ -0,0 +1,46 @@
+# app/job_store.py
+import os
+from typing import Optional
+
+import orjson
+
+
+class InMemoryJobStore:
+    """Per-process job registry. Single dict get/set is atomic under the GIL, so no lock."""
+
+    def __init__(self):
+        self._jobs = {}
+
+    def get(self, video_id: str) -> Optional[dict]:
+        return self._jobs.get(video_id)
+
+    def set(self, video_id: str, state: dict):
+        self._jobs[video_id] = state
+
+
+class RedisJobStore:
+    """Job registry shared by every uvicorn worker, kept in one Redis hash."""
+
+    KEY = "jobs"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("JOB_BACKEND=redis needs the 'redis' package (pip install redis)")
+
+        self._r = redis.Redis.from_url(url)
+
+    def get(self, video_id: str) -> Optional[dict]:
+        raw = self._r.hget(self.KEY, video_id)
+        return orjson.loads(raw) if raw else None
+
+    def set(self, video_id: str, state: dict):
+        self._r.hset(self.KEY, video_id, orjson.dumps(state))
+
+
+def make_job_store():
+    backend = os.environ.get("JOB_BACKEND", "memory")
+    if backend == "redis":
+        return RedisJobStore(os.environ.get("REDIS_URL", "redis://localhost:6379/0"))
+    return InMemoryJobStore()
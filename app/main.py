@@ -1,19 +1,31 @@
 # app/main.py
 import os
-import json
+import hmac
+import hashlib
 import math
 import uuid
 import shutil
+import sqlite3
 import subprocess
+import time
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from threading import Lock
-from typing import Optional, List
+from functools import lru_cache, partial
+from threading import Lock, BoundedSemaphore
+from typing import Optional, List, Callable
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Body, Header
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Header, Depends
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from jose import jwt, JWTError
+from fastapi.concurrency import run_in_threadpool
+import jwt
+import orjson
+from cachetools import TTLCache
+from starlette.formparsers import MultiPartParser
+
+from .job_store import make_job_store
 
 # Config
 
@@ -22,23 +34,66 @@ APP_VERSION = "1.0.0"
 DATA_DIR = os.environ.get("DATA_DIR", "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Uploads: keep small files in memory, copy big ones in 1 MiB steps
+UPLOAD_CHUNK = 1 << 20
+UPLOAD_SPOOL_BYTES = 8 << 20
+for _attr in ("spool_max_size", "max_file_size"):
+    if hasattr(MultiPartParser, _attr):
+        setattr(MultiPartParser, _attr, UPLOAD_SPOOL_BYTES)
+
+# Downloads: stream segments in 1 MiB reads instead of Starlette's 64 KiB default
+FileResponse.chunk_size = 1 << 20
+
 # Auth to be updated
 SECRET = os.environ.get("JWT_SECRET", "dev-only-change-me")
 ALGO = "HS256"
 
+# Decoded claims per raw token, so repeat requests skip the HMAC + JSON parse
+TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=60)
+TLOCK = Lock()
+
 # Hard-coded user and admin user for A1
+_RAW_USERS = {
+    "admin": ("admin123", "admin"),
+    "user": ("user123", "user"),
+}
+# Login compares SHA-256 digests in constant time; the plaintext table is dropped once hashed
 USERS = {
-    "admin": {"password": "admin123", "role": "admin"},
-    "user": {"password": "user123", "role": "user"},
+    name: {"pw_hash": hashlib.sha256(pw.encode()).digest(), "role": role}
+    for name, (pw, role) in _RAW_USERS.items()
 }
+del _RAW_USERS
+
+# Video index (owner/created_at lookups without crawling DATA_DIR)
+INDEX_PATH = os.path.join(DATA_DIR, "index.db")
+IDX = sqlite3.connect(INDEX_PATH, check_same_thread=False)
+ILOCK = Lock()
+with IDX:
+    IDX.execute(
+        "CREATE TABLE IF NOT EXISTS videos("
+        "video_id TEXT PRIMARY KEY, owner TEXT, created_at TEXT, duration REAL, filename TEXT)"
+    )
+    IDX.execute("CREATE INDEX IF NOT EXISTS idx_owner_created ON videos(owner, created_at DESC)")
+    # Admin listings have no owner filter; without this they sort the whole table per request
+    IDX.execute("CREATE INDEX IF NOT EXISTS idx_created ON videos(created_at DESC)")
 
-# In-memory job registry 
-JOBS = {}
-JLOCK = Lock()
+# Job registry (in-memory by default, JOB_BACKEND=redis to share across workers)
+JOBS = make_job_store()
+
+# Async split jobs run here rather than on the request threadpool. Threads suffice:
+# each job just waits on its ffmpeg children. CPU oversubscription is bounded per
+# encode by ENCODE_SLOTS, so several jobs (e.g. quick fast splits) can run side by side.
+SPLIT_JOBS = max(1, int(os.environ.get("SPLIT_JOBS", str(max(2, (os.cpu_count() or 1) // 4)))))
+SPLIT_POOL = ThreadPoolExecutor(max_workers=SPLIT_JOBS, thread_name_prefix="split")
 
 # App
 
-app = FastAPI(title=APP_NAME, version=APP_VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    SPLIT_POOL.shutdown(wait=False, cancel_futures=True)
+
+app = FastAPI(title=APP_NAME, version=APP_VERSION, lifespan=lifespan)
 
 # CORS 
 app.add_middleware(
@@ -56,11 +111,12 @@ if os.path.isdir("static"):
 # Auth helpers
 
 def make_jwt(username: str, role: str) -> str:
+    now = datetime.utcnow()
     payload = {
         "sub": username,
         "role": role,
-        "exp": datetime.utcnow() + timedelta(hours=8),
-        "iat": datetime.utcnow(),
+        "exp": now + timedelta(hours=8),
+        "iat": now,
     }
     return jwt.encode(payload, SECRET, algorithm=ALGO)
 
@@ -68,10 +124,17 @@ def decode_bearer(authorization: str) -> dict:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid Authorization header")
     token = authorization.split(" ", 1)[1]
+    with TLOCK:
+        claims = TOKEN_CACHE.get(token)
+    if claims is not None and claims.get("exp", 0) > time.time():
+        return claims
     try:
-        return jwt.decode(token, SECRET, algorithms=[ALGO])
-    except JWTError:
+        claims = jwt.decode(token, SECRET, algorithms=[ALGO])
+    except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    with TLOCK:
+        TOKEN_CACHE[token] = claims
+    return claims
 
 def current_user(authorization: str) -> str:
     claims = decode_bearer(authorization)
@@ -82,14 +145,30 @@ def require_role(authorization: str, role: str):
     if claims.get("role") != role:
         raise HTTPException(status_code=403, detail="Forbidden")
 
+def authorized_meta(video_id: str, authorization: str = Header(default="")) -> tuple:
+    """Dependency: decode the token once, load meta once, enforce owner/admin access."""
+    claims = decode_bearer(authorization)
+    user, role = claims.get("sub"), claims.get("role")
+    vdir = os.path.join(DATA_DIR, video_id)
+    meta = read_meta(vdir)
+    if not meta:
+        raise HTTPException(404, "Video not found")
+    if role != "admin" and meta.get("owner") != user:
+        raise HTTPException(403, "Forbidden")
+    return user, role, vdir, meta
+
 # ffmpeg helpers
 
+_FFMPEG_OK = False
+
 def _check_ffmpeg():
-    try:
-        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        subprocess.run(["ffprobe", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-    except Exception:
+    global _FFMPEG_OK
+    if _FFMPEG_OK:
+        return
+    # PATH lookup only; spawning "-version" twice just to see the binaries exist costs a fork+exec each
+    if not (shutil.which("ffmpeg") and shutil.which("ffprobe")):
         raise HTTPException(500, "ffmpeg/ffprobe not found on PATH")
+    _FFMPEG_OK = True
 
 def ffprobe_duration(path: str) -> float:
     _check_ffmpeg()
@@ -105,49 +184,213 @@ def ffprobe_duration(path: str) -> float:
     except ValueError:
         raise HTTPException(400, "Could not determine video duration")
 
-def split_video(in_path: str, out_dir: str, parts: int, mode: str) -> List[str]:
+# Segment file suffixes, checked without lowercasing every name
+MP4_SUFFIXES = (".mp4", ".MP4", ".Mp4")
+
+# Heavy mode: x264 stops scaling past ~4 threads, so run several encodes side by side
+HEAVY_THREADS = 4
+
+# Process-wide cap on concurrent x264 encodes, shared by sync and async splits
+ENCODE_SLOTS = BoundedSemaphore(max(1, (os.cpu_count() or 1) // HEAVY_THREADS))
+
+# Hardware encoders are limited by device sessions, not cores (consumer NVENC allows only a few)
+HW_ENCODE_SESSIONS = max(1, int(os.environ.get("HW_ENCODE_SESSIONS", "2")))
+HW_SLOTS = BoundedSemaphore(HW_ENCODE_SESSIONS)
+
+def _segment_bounds(duration: float, parts: int) -> List[tuple]:
+    seg_time = max(duration / max(parts, 1), 0.1)
+    count = max(1, min(parts, math.ceil(duration / seg_time)))
+    return [(i * seg_time, seg_time) for i in range(count)]
+
+HEAVY_FILTERS = "scale=1280:-2,unsharp=5:5:1.0"
+
+# Heavy-mode encoders, best first: (input-side options, extra filters, encoder options)
+HEAVY_ENCODERS = {
+    "h264_nvenc": ([], "", ["-c:v", "h264_nvenc", "-preset", "p5", "-tune", "hq", "-rc", "vbr", "-cq", "23"]),
+    "h264_qsv": ([], "", ["-c:v", "h264_qsv", "-preset", "veryslow", "-global_quality", "23"]),
+    "h264_vaapi": (
+        ["-vaapi_device", "/dev/dri/renderD128"],
+        ",format=nv12,hwupload",
+        ["-c:v", "h264_vaapi", "-qp", "23"],
+    ),
+    "libx264": ([], "", ["-c:v", "libx264", "-preset", "slower", "-crf", "20", "-threads", str(HEAVY_THREADS)]),
+}
+
+_HEAVY_ENCODER = os.environ.get("HEAVY_ENCODER")  # force one, e.g. libx264
+_ENCODER_LOCK = Lock()
+ENCODER_PROBE_TIMEOUT = 15  # seconds; a wedged GPU driver must not hang the first heavy split
+
+def _probe_encoder(pre: List[str], vf: str, enc: List[str]) -> bool:
+    # Being compiled in says nothing about the hardware, so try a tiny encode
+    probe = (
+        ["ffmpeg", "-hide_banner", "-v", "error"] + pre
+        + ["-f", "lavfi", "-i", "color=s=256x256:d=0.1", "-vf", HEAVY_FILTERS + vf]
+        + enc + ["-f", "null", "-"]
+    )
+    try:
+        return subprocess.run(
+            probe, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=ENCODER_PROBE_TIMEOUT
+        ).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def _heavy_encoder() -> str:
+    """Pick a hardware H.264 encoder if one is built in and actually works here, else libx264."""
+    global _HEAVY_ENCODER
+    # Probe once per process; concurrent splits wait here rather than racing test encodes for sessions
+    with _ENCODER_LOCK:
+        if _HEAVY_ENCODER in HEAVY_ENCODERS:
+            return _HEAVY_ENCODER
+        chosen = "libx264"
+        try:
+            listed = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-encoders"],
+                capture_output=True, text=True, check=True, timeout=ENCODER_PROBE_TIMEOUT,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            listed = ""
+        for name, (pre, vf, enc) in HEAVY_ENCODERS.items():
+            if name != "libx264" and name in listed and _probe_encoder(pre, vf, enc):
+                chosen = name
+                break
+        _HEAVY_ENCODER = chosen
+        return chosen
+
+def _encode_cmd(in_path: str, out_path: str, start: float, dur: float, encoder: str = "libx264") -> List[str]:
+    pre, vf, enc = HEAVY_ENCODERS[encoder]
+    return (
+        ["ffmpeg", "-y"] + pre
+        + ["-ss", f"{start}", "-i", in_path, "-t", f"{dur}", "-vf", HEAVY_FILTERS + vf]
+        + enc
+        + ["-c:a", "aac", "-b:a", "128k", out_path]
+    )
+
+def _copy_cmd(in_path: str, out_path: str, start: float, dur: float) -> List[str]:
+    return [
+        "ffmpeg", "-y",
+        "-ss", f"{start}", "-i", in_path, "-t", f"{dur}",
+        # Only streams the MP4 muxer accepts: timecode/data tracks and SRT subtitles would fail the copy
+        "-map", "0:v", "-map", "0:a?", "-dn", "-sn",
+        "-c", "copy",
+        "-avoid_negative_ts", "1",
+        out_path,
+    ]
+
+class _FfmpegGroup:
+    """The ffmpeg children of one split, so a failed part can stop the others writing."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._procs = []
+        self._aborted = False
+
+    def run(self, cmd: List[str], slots: Optional[BoundedSemaphore] = None):
+        if slots is None:
+            return self._run(cmd)
+        with slots:
+            return self._run(cmd)
+
+    def _run(self, cmd: List[str]):
+        with self._lock:
+            if self._aborted:
+                raise RuntimeError("split aborted")
+            proc = subprocess.Popen(cmd)
+            self._procs.append(proc)
+        ret = proc.wait()
+        if ret:
+            raise subprocess.CalledProcessError(ret, cmd)
+
+    def abort(self):
+        with self._lock:
+            self._aborted = True
+            procs = list(self._procs)
+        for proc in procs:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+# Opt-in: evict finished segments from the page cache (write-once data on big heavy splits)
+DROP_SEGMENT_CACHE = os.environ.get("DROP_SEGMENT_CACHE") == "1"
+
+def _drop_page_cache(path: str):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # DONTNEED only drops clean pages, so flush the segment first
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def split_video(
+    in_path: str,
+    out_dir: str,
+    parts: int,
+    mode: str,
+    duration: Optional[float] = None,
+    on_part: Optional[Callable[[str], None]] = None,
+) -> List[str]:
     """
-    mode=fast  -> stream copy (I/O-bound)
-    mode=heavy -> re-encode + filters (CPU-bound)
+    mode=fast  -> keyframe-seek stream copy (I/O-bound), segments copied concurrently
+    mode=heavy -> re-encode + filters (CPU-bound), one ffmpeg per segment in parallel
+    duration   -> as stored in meta.json at upload; only probed again when missing
+    on_part    -> called with each part's path as soon as that part is written
     """
     _check_ffmpeg()
     os.makedirs(out_dir, exist_ok=True)
-    duration = ffprobe_duration(in_path)
-    seg_time = max(duration / max(parts, 1), 0.1)
+    if duration is None:
+        duration = ffprobe_duration(in_path)
+    bounds = _segment_bounds(duration, parts)
 
     if mode not in ("fast", "heavy"):
         mode = "heavy"
 
     if mode == "fast":
-        cmd = [
-            "ffmpeg", "-y", "-i", in_path,
-            "-c", "copy",
-            "-f", "segment",
-            "-segment_time", f"{seg_time}",
-            "-reset_timestamps", "1",
-            os.path.join(out_dir, "part_%02d.mp4"),
-        ]
+        make_cmd, workers, slots = _copy_cmd, min(len(bounds), os.cpu_count() or 1), None
     else:
-        cmd = [
-            "ffmpeg", "-y", "-i", in_path,
-            "-vf", "scale=1280:-2,unsharp=5:5:1.0",
-            "-c:v", "libx264", "-preset", "slower", "-crf", "20",
-            "-c:a", "aac", "-b:a", "128k",
-            "-f", "segment",
-            "-segment_time", f"{seg_time}",
-            "-reset_timestamps", "1",
-            os.path.join(out_dir, "part_%02d.mp4"),
-        ]
-
-    # Execute
+        # Resolve the encoder before fanning out so every part of one split uses the same one
+        encoder = _heavy_encoder()
+        make_cmd = partial(_encode_cmd, encoder=encoder)
+        if encoder == "libx264":
+            workers, slots = max(1, (os.cpu_count() or 1) // HEAVY_THREADS), ENCODE_SLOTS
+        else:
+            workers, slots = HW_ENCODE_SESSIONS, HW_SLOTS
+        workers = min(len(bounds), workers)
+
+    # Execute. Threads only wait on the ffmpeg children; the real work runs out of process
+    group = _FfmpegGroup()
+    pool = ThreadPoolExecutor(max_workers=workers)
     try:
-        subprocess.check_call(cmd)
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(500, f"ffmpeg failed: {e}")
-
-    files = sorted(
-        [os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.lower().endswith(".mp4")]
-    )
+        futures = {}
+        for i, (start, dur) in enumerate(bounds):
+            out_path = os.path.join(out_dir, f"part_{i:02d}.mp4")
+            futures[pool.submit(group.run, make_cmd(in_path, out_path, start, dur), slots)] = out_path
+        for fut in as_completed(futures):
+            fut.result()
+            if DROP_SEGMENT_CACHE:
+                _drop_page_cache(futures[fut])
+            if on_part:
+                on_part(futures[fut])
+    except BaseException as e:
+        # One failed part fails the split: drop queued parts and stop the running ones,
+        # so nothing is still writing into out_dir when a retry starts
+        pool.shutdown(wait=False, cancel_futures=True)
+        group.abort()
+        if isinstance(e, subprocess.CalledProcessError):
+            raise HTTPException(500, f"ffmpeg failed: {e}")
+        raise
+    pool.shutdown()
+
+    with os.scandir(out_dir) as it:
+        files = sorted(e.path for e in it if e.name.endswith(MP4_SUFFIXES) and e.is_file())
     return files
 
 # Models (lightweight – use Body())
@@ -155,16 +398,78 @@ def split_video(in_path: str, out_dir: str, parts: int, mode: str) -> List[str]:
 def json_meta_path(video_dir: str) -> str:
     return os.path.join(video_dir, "meta.json")
 
+@lru_cache(maxsize=4096)
+def _read_meta_cached(path: str, mtime_ns: int) -> dict:
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
 def read_meta(video_dir: str) -> Optional[dict]:
     p = json_meta_path(video_dir)
-    if os.path.exists(p):
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return None
+    try:
+        mtime_ns = os.stat(p).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    # Keyed on mtime so an external edit to meta.json is picked up too
+    return dict(_read_meta_cached(p, mtime_ns))
 
 def write_meta(video_dir: str, meta: dict):
-    with open(json_meta_path(video_dir), "w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False, indent=2)
+    with open(json_meta_path(video_dir), "wb") as f:
+        f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+
+def _sink(src, dst_path: str):
+    """Copy an uploaded file to disk, using sendfile(2) once Starlette has spooled it to a real file."""
+    size = src.seek(0, 2)
+    src.seek(0)
+    out_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Reserve the extents up front so the copy below is a plain data write
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(out_fd, 0, size)
+            except OSError:
+                pass
+        if getattr(src, "_rolled", False) and hasattr(os, "sendfile"):
+            src_fd = getattr(src, "_file", src).fileno()
+            try:
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(out_fd, src_fd, offset, UPLOAD_CHUNK)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                os.lseek(out_fd, 0, os.SEEK_SET)  # filesystem without file-to-file sendfile, fall back below
+        with os.fdopen(out_fd, "wb", closefd=False) as f:
+            shutil.copyfileobj(src, f, UPLOAD_CHUNK)
+    finally:
+        os.close(out_fd)
+
+_INDEX_UPSERT = (
+    "INSERT OR REPLACE INTO videos(video_id, owner, created_at, duration, filename) VALUES (?, ?, ?, ?, ?)"
+)
+
+def _index_row(meta: dict) -> tuple:
+    return (meta["video_id"], meta.get("owner"), meta.get("created_at"), meta.get("duration"), meta.get("filename"))
+
+def index_video(meta: dict):
+    with ILOCK, IDX:
+        IDX.execute(_INDEX_UPSERT, _index_row(meta))
+
+def _backfill_index():
+    # Videos uploaded before the index existed only have meta.json
+    rows = []
+    with os.scandir(DATA_DIR) as it:
+        for entry in it:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            meta = read_meta(entry.path)
+            if meta:
+                rows.append(_index_row({**meta, "video_id": entry.name}))
+    with ILOCK, IDX:
+        IDX.executemany(_INDEX_UPSERT, rows)
+
+_backfill_index()
 
 # API: health/auth
 
@@ -175,7 +480,8 @@ def health():
 @app.post("/auth/login")
 def login(username: str = Body(...), password: str = Body(...)):
     u = USERS.get(username)
-    if not u or u["password"] != password:
+    pw_hash = hashlib.sha256(password.encode()).digest()
+    if not u or not hmac.compare_digest(pw_hash, u["pw_hash"]):
         raise HTTPException(status_code=401, detail="Bad credentials")
     return {"token": make_jwt(username, u["role"]), "role": u["role"]}
 
@@ -193,15 +499,14 @@ async def upload_video(
 
     in_path = os.path.join(vdir, "input.mp4")
     try:
-        with open(in_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        await run_in_threadpool(_sink, file.file, in_path)
     finally:
         try:
             file.file.close()
         except Exception:
             pass
 
-    duration = ffprobe_duration(in_path)
+    duration = await run_in_threadpool(ffprobe_duration, in_path)
     meta = {
         "owner": user,
         "created_at": datetime.utcnow().isoformat() + "Z",
@@ -209,7 +514,8 @@ async def upload_video(
         "filename": file.filename,
         "video_id": vid_id,
     }
-    write_meta(vdir, meta)
+    await run_in_threadpool(write_meta, vdir, meta)
+    await run_in_threadpool(index_video, meta)
     return {"video_id": vid_id, "duration": duration, "filename": file.filename}
 
 @app.get("/videos")
@@ -218,41 +524,28 @@ def list_videos(
     page_size: int = 25,
     authorization: str = Header(default=""),
 ):
-    user = current_user(authorization)
-    items = []
-    for vid in os.listdir(DATA_DIR):
-        vdir = os.path.join(DATA_DIR, vid)
-        if not os.path.isdir(vdir):
-            continue
-        meta = read_meta(vdir)
-        if not meta:
-            continue
-        # owner filter – basic multi-user separation
-        if meta.get("owner") == user or USERS.get(user, {}).get("role") == "admin":
-            items.append({
-                "video_id": vid,
-                "duration": meta.get("duration"),
-                "created_at": meta.get("created_at"),
-                "filename": meta.get("filename"),
-            })
-    #  pagination?
-    items.sort(key=lambda x: x["created_at"], reverse=True)
-    total = len(items)
-    start = (page - 1) * page_size
-    end = start + page_size
-    return {"total": total, "page": page, "page_size": page_size, "videos": items[start:end]}
+    claims = decode_bearer(authorization)
+    # owner filter – basic multi-user separation
+    where, args = "WHERE owner = ?", (claims.get("sub"),)
+    if claims.get("role") == "admin":
+        where, args = "", ()
+    start = max(page - 1, 0) * page_size
+    with ILOCK:
+        total = IDX.execute(f"SELECT COUNT(*) FROM videos {where}", args).fetchone()[0]
+        rows = IDX.execute(
+            f"SELECT video_id, duration, created_at, filename FROM videos {where} "
+            "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            args + (page_size, start),
+        ).fetchall()
+    items = [
+        {"video_id": vid, "duration": duration, "created_at": created_at, "filename": filename}
+        for vid, duration, created_at, filename in rows
+    ]
+    return {"total": total, "page": page, "page_size": page_size, "videos": items}
 
 @app.get("/videos/{video_id}")
-def get_video(video_id: str, authorization: str = Header(default="")):
-    user = current_user(authorization)
-    vdir = os.path.join(DATA_DIR, video_id)
-    meta = read_meta(vdir)
-    if not meta:
-        raise HTTPException(404, "Video not found")
-    owner = meta.get("owner")
-    role = USERS.get(user, {}).get("role")
-    if role != "admin" and owner != user:
-        raise HTTPException(403, "Forbidden")
+def get_video(video_id: str, access: tuple = Depends(authorized_meta)):
+    _, _, _, meta = access
     return {
         "video_id": video_id,
         "filename": meta.get("filename"),
@@ -262,17 +555,8 @@ def get_video(video_id: str, authorization: str = Header(default="")):
     }
 
 @app.get("/segments/{video_id}/source/input.mp4")
-def get_source(video_id: str, authorization: str = Header(default="")):
-    user = current_user(authorization)
-    vdir = os.path.join(DATA_DIR, video_id)
-    meta = read_meta(vdir)
-    if not meta:
-        raise HTTPException(404, "Video not found")
-    owner = meta.get("owner")
-    role = USERS.get(user, {}).get("role")
-    if role != "admin" and owner != user:
-        raise HTTPException(403, "Forbidden")
-
+def get_source(video_id: str, access: tuple = Depends(authorized_meta)):
+    _, _, vdir, _ = access
     path = os.path.join(vdir, "input.mp4")
     if not os.path.exists(path):
         raise HTTPException(404, "Not found")
@@ -280,77 +564,76 @@ def get_source(video_id: str, authorization: str = Header(default="")):
 
 # API: splitting
 
-def _authorize_video_access(video_id: str, user: str):
-    vdir = os.path.join(DATA_DIR, video_id)
-    meta = read_meta(vdir)
-    if not meta:
-        raise HTTPException(404, "Video not found")
-    role = USERS.get(user, {}).get("role")
-    if role != "admin" and meta.get("owner") != user:
-        raise HTTPException(403, "Forbidden")
-    return vdir, meta
-
 @app.post("/videos/{video_id}/split")
 def split_sync(
     video_id: str,
     parts: int = 10,
     mode: str = "heavy",
-    authorization: str = Header(default=""),
+    access: tuple = Depends(authorized_meta),
 ):
-    user = current_user(authorization)
-    vdir, _ = _authorize_video_access(video_id, user)
+    _, _, vdir, meta = access
     in_path = os.path.join(vdir, "input.mp4")
     if not os.path.exists(in_path):
         raise HTTPException(404, "Video not found")
 
     out_dir = os.path.join(vdir, f"segments_{mode}")
-    files = split_video(in_path, out_dir, parts, mode)
+    files = split_video(in_path, out_dir, parts, mode, meta.get("duration"))
     segments = [f"/segments/{video_id}/{mode}/{os.path.basename(x)}" for x in files]
     return {"video_id": video_id, "mode": mode, "parts": len(files), "segments": segments}
 
-def _run_split_job(video_id: str, parts: int, mode: str):
+def _run_split_job(video_id: str, parts: int, mode: str, duration: Optional[float] = None):
     try:
         vdir = os.path.join(DATA_DIR, video_id)
         in_path = os.path.join(vdir, "input.mp4")
         out_dir = os.path.join(vdir, f"segments_{mode}")
-        with JLOCK:
-            JOBS[video_id] = {"status": "processing", "mode": mode, "started_at": datetime.utcnow().isoformat() + "Z"}
-        files = split_video(in_path, out_dir, parts, mode)
-        with JLOCK:
-            JOBS[video_id] = {
-                "status": "done",
+        started_at = datetime.utcnow().isoformat() + "Z"
+        ready = []
+
+        def publish():
+            # Finished parts are listed while the rest encode, so clients can start downloading
+            JOBS.set(video_id, {
+                "status": "processing",
                 "mode": mode,
-                "parts": len(files),
-                "finished_at": datetime.utcnow().isoformat() + "Z",
-            }
+                "started_at": started_at,
+                "parts_done": len(ready),
+                "segments": sorted(ready),
+            })
+
+        def part_done(path: str):
+            ready.append(f"/segments/{video_id}/{mode}/{os.path.basename(path)}")
+            publish()
+
+        publish()
+        files = split_video(in_path, out_dir, parts, mode, duration, on_part=part_done)
+        JOBS.set(video_id, {
+            "status": "done",
+            "mode": mode,
+            "parts": len(files),
+            "parts_done": len(files),
+            "segments": [f"/segments/{video_id}/{mode}/{os.path.basename(x)}" for x in files],
+            "finished_at": datetime.utcnow().isoformat() + "Z",
+        })
     except Exception as e:
-        with JLOCK:
-            JOBS[video_id] = {"status": "error", "error": str(e), "finished_at": datetime.utcnow().isoformat() + "Z"}
+        JOBS.set(video_id, {"status": "error", "error": str(e), "finished_at": datetime.utcnow().isoformat() + "Z"})
 
 @app.post("/videos/{video_id}/split_async")
 def split_async(
     video_id: str,
     parts: int = 10,
     mode: str = "heavy",
-    background_tasks: BackgroundTasks = None,
-    authorization: str = Header(default=""),
+    access: tuple = Depends(authorized_meta),
 ):
-    user = current_user(authorization)
-    vdir, _ = _authorize_video_access(video_id, user)
+    _, _, vdir, meta = access
     if not os.path.exists(os.path.join(vdir, "input.mp4")):
         raise HTTPException(404, "Video not found")
 
-    with JLOCK:
-        JOBS[video_id] = {"status": "queued", "mode": mode, "queued_at": datetime.utcnow().isoformat() + "Z"}
-    background_tasks.add_task(_run_split_job, video_id, parts, mode)
+    JOBS.set(video_id, {"status": "queued", "mode": mode, "queued_at": datetime.utcnow().isoformat() + "Z"})
+    SPLIT_POOL.submit(_run_split_job, video_id, parts, mode, meta.get("duration"))
     return {"job": video_id, "status": "queued"}
 
 @app.get("/jobs/{video_id}")
-def job_status(video_id: str, authorization: str = Header(default="")):
-    user = current_user(authorization)
-    vdir, _ = _authorize_video_access(video_id, user)
-    with JLOCK:
-        job = JOBS.get(video_id)
+def job_status(video_id: str, access: tuple = Depends(authorized_meta)):
+    job = JOBS.get(video_id)
     if not job:
         return {"status": "unknown"}
     return job
@@ -361,23 +644,25 @@ def job_status(video_id: str, authorization: str = Header(default="")):
 def list_segments(
     video_id: str,
     mode: Optional[str] = None,
-    authorization: str = Header(default=""),
+    access: tuple = Depends(authorized_meta),
 ):
-    user = current_user(authorization)
-    vdir, _ = _authorize_video_access(video_id, user)
+    _, _, vdir, _ = access
 
     modes = []
     if mode:
         modes = [f"segments_{mode}"]
     else:
-        modes = [d for d in os.listdir(vdir) if d.startswith("segments_") and os.path.isdir(os.path.join(vdir, d))]
+        with os.scandir(vdir) as it:
+            modes = [e.name for e in it if e.name.startswith("segments_") and e.is_dir(follow_symlinks=False)]
 
     outputs = []
     for m in modes:
         mdir = os.path.join(vdir, m)
-        if not os.path.isdir(mdir):
+        try:
+            with os.scandir(mdir) as it:
+                files = sorted(e.name for e in it if e.name.endswith(MP4_SUFFIXES) and e.is_file())
+        except (FileNotFoundError, NotADirectoryError):
             continue
-        files = sorted([f for f in os.listdir(mdir) if f.lower().endswith(".mp4")])
         outputs.append({
             "mode": m.replace("segments_", ""),
             "parts": len(files),
@@ -391,10 +676,9 @@ def get_segment(
     video_id: str,
     mode: str,
     filename: str,
-    authorization: str = Header(default=""),
+    access: tuple = Depends(authorized_meta),
 ):
-    user = current_user(authorization)
-    vdir, _ = _authorize_video_access(video_id, user)
+    _, _, vdir, _ = access
     path = os.path.join(vdir, f"segments_{mode}", filename)
     if not os.path.exists(path):
         raise HTTPException(404, "Not found")